@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import copy
+import logging
+import os
+from collections import OrderedDict
 from collections.abc import Callable, Sequence
 from datetime import datetime
+from enum import StrEnum
+from functools import cache, cached_property, lru_cache
 from pathlib import Path
-from typing import ClassVar
+from typing import TYPE_CHECKING, ClassVar
 
-import click
 import yaml
-from pydantic import BaseModel, Field
-from pydantic.functional_validators import field_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationInfo
+from pydantic.functional_validators import field_validator, model_validator
 from pydantic.types import SecretStr
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.builtin_tools import AbstractBuiltinTool, WebSearchTool
@@ -17,31 +22,54 @@ from pydantic_ai.messages import (
     PartDeltaEvent,
     PartStartEvent,
     TextPartDelta,
+    ThinkingPart,
     ThinkingPartDelta,
+    ToolCallPart,
     ToolCallPartDelta,
 )
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic_ai.models.google import GoogleModel
-from pydantic_ai.models.openai import OpenAIChatModel
-from pydantic_ai.providers.anthropic import AnthropicProvider
-from pydantic_ai.providers.google import GoogleProvider
-from pydantic_ai.providers.openai import OpenAIProvider
-from pydantic_ai.run import AgentRun
+from pydantic_ai.run import AgentRun, AgentRunResult
+from pydantic_ai.toolsets.function import FunctionToolset
 from pydantic_ai.usage import RunUsage
-from pydantic_settings import BaseSettings
-from pydantic_settings.main import SettingsConfigDict
 
 from dzai.logging_utils import logger
-from dzai.retry_utils import create_retrying_client, google_retrying_client
+from dzai.retry_utils import aclose_shared_client, get_shared_client, google_retrying_client
 from dzai.tools.registry import todo_toolset
 
+if TYPE_CHECKING:
+    from google.genai import Client
+    from pydantic_ai.models.anthropic import AnthropicModel
+    from pydantic_ai.models.google import GoogleModel
+    from pydantic_ai.models.openai import OpenAIChatModel
 
-class Settings(BaseSettings):
-    ANTHROPIC_API_KEY: SecretStr = SecretStr("some-secret")
+# LibYAML's C loader is much faster than the pure-Python one, but is only available when PyYAML is built with it.
+if yaml.__with_libyaml__:
+    from yaml.cyaml import CSafeLoader as _SafeLoader
+else:
+    from yaml import SafeLoader as _SafeLoader
 
-    GEMINI_API_KEY: SecretStr = SecretStr("some-secret")
+# Parsed YAML configs and built agent specs, invalidated when the file's mtime or size changes.
+_CACHE_MAX_ENTRIES = 100
+_YAML_CACHE: OrderedDict[Path, tuple[int, int, dict]] = OrderedDict()
+# Specs are also keyed by the API keys, since their tool-agents are built with them.
+_SPEC_CACHE: OrderedDict[tuple[Path, SecretStr | None, SecretStr | None], tuple[int, int, AgentSpec]] = OrderedDict()
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+# Google clients keyed by API key, closed by `aclose_clients`
+_GOOGLE_CLIENTS: dict[SecretStr, Client] = {}
+
+_OUTPUTS_DIR = Path("outputs")
+
+
+def _api_key(env_var: str) -> SecretStr:
+    """API key from the environment. `.env` is loaded into the environment by the CLI."""
+    return SecretStr(os.environ.get(env_var, "some-secret"))
+
+
+class ToolName(StrEnum):
+    TODO = "todo"
+
+
+class BuiltinToolName(StrEnum):
+    WEB_SEARCH = "web_search"
 
 
 class ModelSettingsSpec(BaseModel):
@@ -54,6 +82,9 @@ class ModelSettingsSpec(BaseModel):
 class AgentSpec(BaseModel):
     """Specification for pydantic-ai Agent"""
 
+    # Specs are shared through the spec cache, so they must not change after loading.
+    model_config = ConfigDict(frozen=True)
+
     # Class variable - NOT a Pydantic field
     # This allows us to use this variable within a class method without creating an instance first.
     agent_root_dir: ClassVar[Path] = Path(__file__).resolve().parent / "agents"
@@ -70,8 +101,8 @@ class AgentSpec(BaseModel):
     model_settings: ModelSettingsSpec | None = None
 
     # Tools configuration
-    tools: list[str] = []
-    builtin_tools: list[str] = []
+    tools: frozenset[ToolName] = frozenset()
+    builtin_tools: frozenset[BuiltinToolName] = frozenset()
 
     # Agents as tools
     agent_tools: list[Callable] = []
@@ -81,35 +112,42 @@ class AgentSpec(BaseModel):
 
     gemini_api_key: SecretStr | None = None
 
+    # Parsed from `model` once at validation time
+    _provider: str = PrivateAttr()
+    _model_name: str = PrivateAttr()
+
     @classmethod
     def from_agent(
         cls, agent_name: str, *, anthropic_api_key: SecretStr | None = None, gemini_api_key: SecretStr | None = None
     ) -> AgentSpec:
         """Load agent specification from YAML file"""
-        config_path = cls.agent_root_dir / f"{agent_name}.yml"
-        assert config_path.exists(), f"Config file does not exist at {config_path}."
-
-        with config_path.open() as cf:
-            yaml_spec = yaml.safe_load(cf)
-            return AgentSpec.model_validate(
-                {**yaml_spec, "gemini_api_key": gemini_api_key, "anthropic_api_key": anthropic_api_key}
-            )
+        return _from_agent_raw(
+            cls.agent_root_dir, agent_name, anthropic_api_key=anthropic_api_key, gemini_api_key=gemini_api_key
+        ).model_copy()
 
-    @property
+    @cached_property
     def provider_model(self) -> AnthropicModel | OpenAIChatModel | GoogleModel:
-        provider = self.model.split(":")[0]
-        model = self.model.split(":")[1]
-        client = create_retrying_client()
-        match provider:
+        # Provider SDKs are imported on first use; each one adds hundreds of ms to import time.
+        match self._provider:
             case "anthropic":
-                return AnthropicModel(model, provider=AnthropicProvider(http_client=client))
+                from pydantic_ai.models.anthropic import AnthropicModel
+                from pydantic_ai.providers.anthropic import AnthropicProvider
+
+                return AnthropicModel(self._model_name, provider=AnthropicProvider(http_client=get_shared_client()))
             case "openai":
-                return OpenAIChatModel(model, provider=OpenAIProvider(http_client=client))
+                from pydantic_ai.models.openai import OpenAIChatModel
+                from pydantic_ai.providers.openai import OpenAIProvider
+
+                return OpenAIChatModel(self._model_name, provider=OpenAIProvider(http_client=get_shared_client()))
             case "google":
+                from pydantic_ai.models.google import GoogleModel
+                from pydantic_ai.providers.google import GoogleProvider
+
                 # This is not amazing right now. We can't do both user tools and built in tools!
                 assert self.gemini_api_key is not None, "`GEMINI_API_KEY` is not set."
-                client = google_retrying_client(api_key=self.gemini_api_key)
-                return GoogleModel(model, provider=GoogleProvider(client=client))
+                return GoogleModel(
+                    self._model_name, provider=GoogleProvider(client=_shared_google_client(self.gemini_api_key))
+                )
             case _:
                 raise ValueError(f"Unsupported model type: {self.model}")
 
@@ -117,34 +155,67 @@ class AgentSpec(BaseModel):
     def all_tools(self) -> list[Callable]:
         return self.agent_tools
 
+    @model_validator(mode="after")
+    def _parse_model(self) -> AgentSpec:
+        self._provider, _, self._model_name = self.model.partition(":")
+        return self
+
+    @field_validator("instructions", mode="before")
+    @classmethod
+    def _join_instructions(cls, instructions: str | list[str]) -> str:
+        """Instructions may be written in YAML as a list of lines; join them once at load time."""
+        if isinstance(instructions, list):
+            return "\n".join(instructions)
+        return instructions
+
     @field_validator("agent_tools", mode="before")
     @classmethod
-    def _agent_tool(cls, agent_tools: list[str]) -> list[Callable]:
+    def _agent_tool(cls, agent_tools: list[str] | list[Callable], info: ValidationInfo) -> list[Callable]:
         """
         We want to take agent name as input in the YML file but convert
         to a callable that can be input into the Pydantic Agent(...)
+        Tool-agents are built with the API keys passed as validation context by `from_agent`.
         """
+        # Already converted, e.g. when re-validating a spec that was loaded before.
+        converted = [tool for tool in agent_tools if callable(tool)]
+        if len(converted) == len(agent_tools):
+            return converted
+
+        api_keys = info.context or {}
         tools = []
         for tool in agent_tools:
-            assert Path(cls.agent_root_dir / f"{tool}.yml").exists(), (
+            assert tool in _available_agents(cls.agent_root_dir), (
                 f"Agent tool {tool} does not exist in dir: {cls.agent_root_dir}."
             )
-            tools.append(AgentSpec.from_agent(tool)._as_tool())
+            st = (cls.agent_root_dir / f"{tool}.yml").stat()
+            tools.append(
+                _agent_as_tool(
+                    tool,
+                    mtime_ns=st.st_mtime_ns,
+                    size=st.st_size,
+                    anthropic_api_key=api_keys.get("anthropic_api_key"),
+                    gemini_api_key=api_keys.get("gemini_api_key"),
+                )
+            )
         return tools
 
     def _as_tool(self) -> Callable:
         """
         Convert this agent spec into a tool function
         All the metaprogramming is required to send the correct function annotations.
+
+        When the model calls several tools in one response, pydantic-ai already runs them concurrently as
+        asyncio tasks, so the same `agent` may serve overlapping runs. An exception from any of them aborts
+        the parent run.
         """
 
-        async def agent_tool(ctx: RunContext[None], query: str) -> str:
-            agent = Agent(
-                model=self.provider_model,
-                instructions=self.instructions,
-                name=self.name,
-            )
+        agent = Agent(
+            model=self.provider_model,
+            instructions=self.instructions,
+            name=self.name,
+        )
 
+        async def agent_tool(ctx: RunContext[None], query: str) -> str:
             result = await agent.run(query, usage=ctx.usage)
             return result.output
 
@@ -160,6 +231,141 @@ class AgentSpec(BaseModel):
         return agent_tool
 
 
+@cache
+def _available_agents(agent_root_dir: Path) -> frozenset[str]:
+    """Agent names in the folder, listed once so existence checks are set lookups instead of `stat()` calls."""
+    return frozenset(config_path.stem for config_path in agent_root_dir.glob("*.yml"))
+
+
+@lru_cache(maxsize=256)
+def _agent_as_tool(
+    agent_name: str,
+    *,
+    mtime_ns: int,
+    size: int,
+    anthropic_api_key: SecretStr | None,
+    gemini_api_key: SecretStr | None,
+) -> Callable:
+    """
+    Tool-agents referenced by several parents share one callable, and with it one sub-agent.
+    `mtime_ns` and `size` are only part of the cache key, so an edited config builds a new tool.
+    The sub-agent's model is built here, so it needs the API keys up front.
+    """
+    return AgentSpec.from_agent(
+        agent_name, anthropic_api_key=anthropic_api_key, gemini_api_key=gemini_api_key
+    )._as_tool()
+
+
+def _shared_google_client(api_key: SecretStr) -> Client:
+    """Single Google client per API key so all Gemini agents share one connection pool."""
+    client = _GOOGLE_CLIENTS.get(api_key)
+    if client is None:
+        client = _GOOGLE_CLIENTS[api_key] = google_retrying_client(api_key=api_key)
+    return client
+
+
+async def aclose_clients() -> None:
+    """
+    Close the shared HTTP clients. Call this before the event loop shuts down.
+    Cached tool-agents are bound to the closed clients, so they are dropped too
+    and the next run builds fresh ones.
+    """
+    await asyncio.gather(aclose_shared_client(), *(client.aio.aclose() for client in _GOOGLE_CLIENTS.values()))
+    _GOOGLE_CLIENTS.clear()
+    # Cached specs hold the tool-agent callables.
+    _SPEC_CACHE.clear()
+    _agent_as_tool.cache_clear()
+
+
+def _from_agent_raw(
+    agent_root_dir: Path,
+    agent_name: str,
+    *,
+    anthropic_api_key: SecretStr | None,
+    gemini_api_key: SecretStr | None,
+) -> AgentSpec:
+    """Validated agent specification, cached per API keys until the YAML file changes. Callers get a copy."""
+    config_path = agent_root_dir / f"{agent_name}.yml"
+    assert agent_name in _available_agents(agent_root_dir), f"Config file does not exist at {config_path}."
+
+    st = config_path.stat()
+    cache_key = (config_path, anthropic_api_key, gemini_api_key)
+    cached = _SPEC_CACHE.get(cache_key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        _SPEC_CACHE.move_to_end(cache_key)
+        return cached[2]
+
+    api_keys = {"anthropic_api_key": anthropic_api_key, "gemini_api_key": gemini_api_key}
+    yaml_spec = _load_yaml(config_path, mtime_ns=st.st_mtime_ns, size=st.st_size)
+    # The keys are also passed as context, for the `agent_tools` validator to build tool-agents with.
+    agent_spec = AgentSpec.model_validate(yaml_spec | api_keys, context=api_keys)
+    _cache_put(_SPEC_CACHE, cache_key, (st.st_mtime_ns, st.st_size, agent_spec))
+    return agent_spec
+
+
+def _cache_put[K, V](cache: OrderedDict[K, V], key: K, value: V) -> None:
+    """Insert into an LRU cache, evicting the least recently used entry once full."""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > _CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+
+
+def _load_yaml(config_path: Path, *, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML config, reusing the cached dict while the file is unchanged."""
+    cached = _YAML_CACHE.get(config_path)
+    if cached is not None and cached[0] == mtime_ns and cached[1] == size:
+        _YAML_CACHE.move_to_end(config_path)
+        return copy.copy(cached[2])
+
+    yaml_spec = _read_yaml(config_path)
+    _cache_put(_YAML_CACHE, config_path, (mtime_ns, size, yaml_spec))
+    return copy.copy(yaml_spec)
+
+
+def _read_yaml(config_path: Path) -> dict:
+    """Read and parse a YAML config without touching any cache, so it is safe to run in a worker thread."""
+    # Binary mode lets LibYAML read the raw bytes from the handle without a Python-level text decoder.
+    with config_path.open("rb") as cf:
+        return yaml.load(cf, Loader=_SafeLoader)
+
+
+def _handle_part_start(event: PartStartEvent, thinking_parts: list[str], text_parts: list[str]) -> None:
+    logger.debug("📝 Starting part %d: %s", event.index, type(event.part).__name__)
+
+
+def _handle_part_delta(event: PartDeltaEvent, thinking_parts: list[str], text_parts: list[str]) -> None:
+    handler = _DELTA_HANDLERS.get(type(event.delta))
+    if handler is not None:
+        handler(event.delta, thinking_parts, text_parts)
+
+
+def _handle_thinking_delta(delta: ThinkingPartDelta, thinking_parts: list[str], text_parts: list[str]) -> None:
+    # Signature-only deltas carry no content.
+    if delta.content_delta:
+        thinking_parts.append(delta.content_delta)
+
+
+def _handle_text_delta(delta: TextPartDelta, thinking_parts: list[str], text_parts: list[str]) -> None:
+    text_parts.append(delta.content_delta)
+
+
+def _handle_tool_call_delta(delta: ToolCallPartDelta, thinking_parts: list[str], text_parts: list[str]) -> None:
+    logger.debug("🔧 Tool call: %s", delta)
+
+
+# Stream events are dispatched on their exact type; one dict lookup per event instead of an isinstance ladder.
+_DELTA_HANDLERS: dict[type, Callable[..., None]] = {
+    ThinkingPartDelta: _handle_thinking_delta,
+    TextPartDelta: _handle_text_delta,
+    ToolCallPartDelta: _handle_tool_call_delta,
+}
+_EVENT_HANDLERS: dict[type, Callable[..., None]] = {
+    PartStartEvent: _handle_part_start,
+    PartDeltaEvent: _handle_part_delta,
+}
+
+
 async def _agent_run_results[AgentDepsT, AgentResultT](
     run: AgentRun[AgentDepsT, AgentResultT], *, agent: Agent[AgentDepsT, AgentResultT]
 ) -> None:
@@ -167,125 +373,240 @@ async def _agent_run_results[AgentDepsT, AgentResultT](
     The complex typing is inherited from the Pydantic way of doing typing.
     I am not sure what the more correct way of doing this is without necessarily defining deps and result types.
     """
+    # Streaming only feeds the debug logs. Without them, nodes run to completion and the thinking is read
+    # from the finished model response instead.
+    stream_events = logger.isEnabledFor(logging.DEBUG)
     step_count = 0
     async for node in run:
         step_count += 1
-        logger.debug(f"--- Step {step_count} ---")
+        logger.debug("--- Step %d ---", step_count)
 
         if agent.is_user_prompt_node(node):
-            logger.debug(f"👤 User Prompt: {node.user_prompt}")
+            logger.debug("👤 User Prompt: %s", node.user_prompt)
 
         elif agent.is_model_request_node(node):
             logger.debug("🤖 Model Request Node")
+            if not stream_events:
+                continue
 
             async with node.stream(run.ctx) as stream:
-                thinking_buffer = ""
-                text_buffer = ""
+                thinking_parts: list[str] = []
+                text_parts: list[str] = []
                 async for event in stream:
-                    if isinstance(event, PartStartEvent):
-                        logger.debug(f"📝 Starting part {event.index}: {type(event.part).__name__}")
-
-                    elif isinstance(event, PartDeltaEvent):
-                        if isinstance(event.delta, ThinkingPartDelta):
-                            thinking_buffer += event.delta.content_delta
-                        elif isinstance(event.delta, TextPartDelta):
-                            text_buffer += event.delta.content_delta
-                        elif isinstance(event.delta, ToolCallPartDelta):
-                            logger.debug(f"🔧 Tool call: {event.delta}")
-
-                if thinking_buffer:
-                    logger.info(f"🤔 Thinking: {thinking_buffer[:500]}{'...' if len(thinking_buffer) > 500 else ''}")
+                    handler = _EVENT_HANDLERS.get(type(event))
+                    if handler is not None:
+                        handler(event, thinking_parts, text_parts)
+
+                _log_thinking("".join(thinking_parts))
+                text_buffer = "".join(text_parts)
                 if text_buffer:
-                    logger.debug(f"💬 Response: {text_buffer[:200]}{'...' if len(text_buffer) > 200 else ''}")
+                    logger.debug("💬 Response: %s%s", text_buffer[:200], "..." if len(text_buffer) > 200 else "")
 
         elif agent.is_call_tools_node(node):
+            if not stream_events:
+                _log_thinking(
+                    "".join(part.content for part in node.model_response.parts if isinstance(part, ThinkingPart))
+                )
+                continue
+
             logger.debug("⚙️ Calling Tools Node")
+            tool_names = [part.tool_name for part in node.model_response.parts if isinstance(part, ToolCallPart)]
+            if len(tool_names) > 1:
+                logger.debug("   🔀 Running %d tools concurrently: %s", len(tool_names), tool_names)
 
             async with node.stream(run.ctx) as handle_stream:
                 async for event in handle_stream:
-                    logger.debug(f"   🔧 Tool event: {type(event).__name__}: {event}")
+                    logger.debug("   🔧 Tool event: %s: %s", type(event).__name__, event)
 
         else:
-            logger.info(f"❓ Unknown node type: {type(node).__name__}")
+            logger.info("❓ Unknown node type: %s", type(node).__name__)
+
+    logger.info("🎯 Agent execution completed in %d steps", step_count)
+
+
+def _log_thinking(thinking: str) -> None:
+    if thinking:
+        logger.info("🤔 Thinking: %s%s", thinking[:500], "..." if len(thinking) > 500 else "")
 
-    logger.info(f"🎯 Agent execution completed in {step_count} steps")
+
+async def _prewarm_agent_tools(
+    agent_name: str, *, anthropic_api_key: SecretStr | None = None, gemini_api_key: SecretStr | None = None
+) -> None:
+    """
+    Read the agent's tool-agent configs concurrently, so validating the agent afterwards parses them from the
+    YAML cache instead of reading them one after another. Configs that are cached and unchanged are skipped.
+
+    Only the file reads run in worker threads. Validating the tool-agents builds their tools and clients, whose
+    caches are not thread-safe, so that stays on the event loop thread.
+    """
+    agent_root_dir = AgentSpec.agent_root_dir
+    if agent_name not in _available_agents(agent_root_dir):
+        return
+
+    config_path = agent_root_dir / f"{agent_name}.yml"
+    st = config_path.stat()
+    # A cached spec already holds its tool-agents, so there is nothing to read.
+    cached_spec = _SPEC_CACHE.get((config_path, anthropic_api_key, gemini_api_key))
+    if cached_spec is not None and cached_spec[0] == st.st_mtime_ns and cached_spec[1] == st.st_size:
+        return
+
+    tool_names = _load_yaml(config_path, mtime_ns=st.st_mtime_ns, size=st.st_size).get("agent_tools", [])
+
+    tool_paths: list[Path] = []
+    tool_stats: list[os.stat_result] = []
+    # Missing tool-agents are reported by validation.
+    for tool_name in tool_names:
+        if tool_name not in _available_agents(agent_root_dir):
+            continue
+        tool_path = agent_root_dir / f"{tool_name}.yml"
+        tool_st = tool_path.stat()
+        cached_yaml = _YAML_CACHE.get(tool_path)
+        if cached_yaml is None or cached_yaml[0] != tool_st.st_mtime_ns or cached_yaml[1] != tool_st.st_size:
+            tool_paths.append(tool_path)
+            tool_stats.append(tool_st)
+
+    yaml_specs = await asyncio.gather(*(asyncio.to_thread(_read_yaml, tool_path) for tool_path in tool_paths))
+    for tool_path, tool_st, yaml_spec in zip(tool_paths, tool_stats, yaml_specs, strict=True):
+        _cache_put(_YAML_CACHE, tool_path, (tool_st.st_mtime_ns, tool_st.st_size, yaml_spec))
+
+
+@cache
+def _outputs_dir() -> Path:
+    """Create the outputs folder once per process."""
+    _OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
+    return _OUTPUTS_DIR
 
 
 async def main(agent_name: str, query: str) -> None:
     """Load and run agent from YAML configuration"""
 
-    settings = Settings()
-    agent_spec = AgentSpec.from_agent(agent_name, gemini_api_key=settings.GEMINI_API_KEY)
+    agent_spec = await _load_agent_spec(agent_name)
+    agent = _build_agent(agent_spec)
+
+    logger.info("Starting agent run for Agent: %s.", agent_spec.name)
+    usage = RunUsage()
+
+    # The outputs folder is prepared while the agent runs.
+    result, outputs_dir = await asyncio.gather(
+        _run_agent(agent, query, usage=usage, toolsets=_run_toolsets(agent_spec)), asyncio.to_thread(_outputs_dir)
+    )
+
+    logger.info("📊 Final result type: %s", type(result))
+
+    logger.info(
+        "Input tokens: %d, Output tokens: %d, Total tokens: %d, Details: %s",
+        usage.input_tokens,
+        usage.output_tokens,
+        usage.total_tokens,
+        usage.details,
+    )
+
+    await _write_outputs(result, outputs_dir=outputs_dir)
+
+
+async def batch_main(agent_name: str, queries: list[str]) -> None:
+    """
+    Run the agent on every query concurrently and write one output file per successful query.
+    Files are numbered by the query's position, so failed queries leave a gap instead of shifting the rest.
+    """
+    outputs, outputs_dir = await asyncio.gather(run_batch(agent_name, queries), asyncio.to_thread(_outputs_dir))
+
+    timestamp = datetime.now().isoformat(timespec="seconds")
+    output_files: dict[Path, str] = {}
+    for index, output in enumerate(outputs):
+        if isinstance(output, BaseException):
+            logger.error("Query %d failed: %s", index, queries[index], exc_info=output)
+        else:
+            output_files[outputs_dir / f"output_{timestamp}_{index}.md"] = output
+    await asyncio.gather(
+        *(
+            asyncio.to_thread(output_file.write_text, output, encoding="utf-8")
+            for output_file, output in output_files.items()
+        )
+    )
+
+    logger.info("%d of %d outputs written to %s.", len(output_files), len(outputs), outputs_dir)
+
+
+async def run_batch(agent_name: str, queries: list[str], concurrency: int = 5) -> list[str | BaseException]:
+    """
+    Run the agent on every query, with at most `concurrency` runs in flight.
+    The agent is built once and shared; provider rate limits rather than latency then bound the wall time.
+    A query that still fails after retries returns its exception in place of the output, so it doesn't
+    discard the other results.
+    """
+    agent_spec = await _load_agent_spec(agent_name)
+    agent = _build_agent(agent_spec)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    logger.info("Starting %d agent runs for Agent: %s.", len(queries), agent_spec.name)
+    return list(
+        await asyncio.gather(
+            *(_run_one(agent, query, semaphore=semaphore, toolsets=_run_toolsets(agent_spec)) for query in queries),
+            return_exceptions=True,
+        )
+    )
+
 
+async def _load_agent_spec(agent_name: str) -> AgentSpec:
+    gemini_api_key = _api_key("GEMINI_API_KEY")
+    await _prewarm_agent_tools(agent_name, gemini_api_key=gemini_api_key)
+    return AgentSpec.from_agent(agent_name, gemini_api_key=gemini_api_key)
+
+
+def _build_agent(agent_spec: AgentSpec) -> Agent[None, str]:
     # Prepare builtin tools
     builtin_tools: Sequence[AbstractBuiltinTool] = []
-    # ToDo: Make this an enum and the loading should be part of AgentSpec validation
-    if "web_search" in agent_spec.builtin_tools:
+    # ToDo: The loading should be part of AgentSpec validation
+    if BuiltinToolName.WEB_SEARCH in agent_spec.builtin_tools:
         builtin_tools.append(WebSearchTool())
 
-    toolsets = []
-    # ToDo: Should be an enum and should come from agent validation
-    if "todo" in agent_spec.tools:
-        toolsets.append(todo_toolset())
-
-    agent = Agent(
+    return Agent(
         model=agent_spec.provider_model,
         instructions=agent_spec.instructions,
         name=agent_spec.name,
         tools=agent_spec.all_tools,
         # TODO: This should be from the registry
-        toolsets=toolsets,
-        # TODO: This should be from the registry
         builtin_tools=builtin_tools,
     )
 
-    logger.info(f"Starting agent run for Agent: {agent_spec.name}.")
-    usage = RunUsage()
-
-    async with agent.iter(query, usage=usage) as run:
-        await _agent_run_results(run, agent=agent)
-
-    logger.info(f"📊 Final result type: {type(run.result)}")
-
-    logger.info(
-        f"Input tokens: {usage.input_tokens}, Output tokens: {usage.output_tokens}, "
-        f"Total tokens: {usage.total_tokens}, Details: {usage.details}"
-    )
-
-    # Write output to file
-    output_file = Path("outputs") / f"output_{datetime.now().isoformat(timespec='seconds')}.md"
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    with output_file.open("w") as of:
-        of.write(run.result.output)
 
-    logger.info(f"Output written to {output_file}.")
+def _run_toolsets(agent_spec: AgentSpec) -> list[FunctionToolset]:
+    """Toolsets with state are created per run, so concurrent runs of one agent don't share it."""
+    toolsets = []
+    # ToDo: Should come from agent validation
+    if ToolName.TODO in agent_spec.tools:
+        toolsets.append(todo_toolset())
+    return toolsets
 
-    # Write message history to file
-    messages_file = Path("outputs") / f"messages_{datetime.now().isoformat(timespec='seconds')}.json"
-    with messages_file.open("wb") as mf:
-        mf.write(run.result.all_messages_json())
 
-    logger.info(f"Message history written to {messages_file}.")
+async def _run_one(
+    agent: Agent[None, str], query: str, *, semaphore: asyncio.Semaphore, toolsets: list[FunctionToolset]
+) -> str:
+    async with semaphore:
+        result = await agent.run(query, toolsets=toolsets)
+    return result.output
 
 
-@click.command(
-    help="Run an AI agent.\n\nAgents available are:\n\n  api-research-agent: To research a lib/API on implementation.",
-    no_args_is_help=True,
-)
-@click.argument("agent_name", required=True)
-@click.option("-q", "--query", help="Query to send to the agent", required=True)
-def cli(agent_name: str, query: str) -> None:
-    """
-    Run an agent from the agents folder
+async def _run_agent(
+    agent: Agent[None, str], query: str, *, usage: RunUsage, toolsets: list[FunctionToolset]
+) -> AgentRunResult[str]:
+    async with agent.iter(query, usage=usage, toolsets=toolsets) as run:
+        await _agent_run_results(run, agent=agent)
 
-    Usage:
-        # Note that name after agent is the name of the yml file in the agents folder.
-        uv run agent api-research-agent -q "hello"
+    assert run.result is not None, "Agent run finished without a result."
+    return run.result
 
-        LOG_LEVEL=debug uv run agent api-research-agent -q "hello" # Enable debug logging
-    """
-    asyncio.run(main(agent_name, query))
 
+async def _write_outputs(result: AgentRunResult[str], *, outputs_dir: Path) -> None:
+    """Write the output and message history to file"""
+    timestamp = datetime.now().isoformat(timespec="seconds")
+    output_file = outputs_dir / f"output_{timestamp}.md"
+    messages_file = outputs_dir / f"messages_{timestamp}.json"
+    await asyncio.gather(
+        asyncio.to_thread(output_file.write_text, result.output, encoding="utf-8"),
+        asyncio.to_thread(messages_file.write_bytes, result.all_messages_json()),
+    )
 
-if __name__ == "__main__":
-    cli()
+    logger.info("Output written to %s.", output_file)
+    logger.info("Message history written to %s.", messages_file)
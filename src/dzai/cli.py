@@ -0,0 +1,62 @@
+import asyncio
+from collections.abc import Coroutine
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import click
+from dotenv import load_dotenv
+
+
+@click.command(
+    help="Run an AI agent.\n\nAgents available are:\n\n  api-research-agent: To research a lib/API on implementation.",
+    no_args_is_help=True,
+)
+@click.argument("agent_name", required=True)
+@click.option("-q", "--query", help="Query to send to the agent")
+@click.option(
+    "--queries-file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="File with one query per line, run concurrently against the agent",
+)
+def cli(agent_name: str, query: str | None, queries_file: Path | None) -> None:
+    """
+    Run an agent from the agents folder
+
+    Usage:
+        # Note that name after agent is the name of the yml file in the agents folder.
+        uv run agent api-research-agent -q "hello"
+
+        LOG_LEVEL=debug uv run agent api-research-agent -q "hello" # Enable debug logging
+
+        uv run agent api-research-agent --queries-file queries.txt # Run many queries in one process
+    """
+    if (query is None) == (queries_file is None):
+        raise click.UsageError("Pass exactly one of `--query` or `--queries-file`.")
+
+    # Loaded before importing the agent so that `.env` settings like `LOG_LEVEL` apply to logging setup too.
+    load_dotenv(".env")
+
+    # Imported here so `--help` and usage errors don't pay for loading pydantic-ai.
+    from dzai.agent import batch_main, main
+
+    if queries_file is not None:
+        queries = [line for line in queries_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+        asyncio.run(_run_and_close(batch_main(agent_name, queries)))
+    elif query is not None:
+        asyncio.run(_run_and_close(main(agent_name, query)))
+
+
+async def _run_and_close(run: Coroutine[None, None, None]) -> None:
+    """
+    Close the shared HTTP clients while the event loop that owns their connections is still running,
+    also when the run fails.
+    """
+    from dzai.agent import aclose_clients
+
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(aclose_clients)
+        await run
+
+
+if __name__ == "__main__":
+    cli()
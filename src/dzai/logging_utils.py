@@ -3,8 +3,13 @@ import os
 
 
 def _logger(log_level: int) -> logging.Logger:
-    logging.basicConfig(level=log_level, format="%(asctime)s - %(filename)s - %(lineno)d - %(levelname)s - %(message)s")
-    return logging.getLogger()
+    root = logging.getLogger()
+    # `basicConfig` is a no-op once the root logger has handlers, so skip its lock on re-import.
+    if not root.handlers:
+        logging.basicConfig(
+            level=log_level, format="%(asctime)s - %(filename)s - %(lineno)d - %(levelname)s - %(message)s"
+        )
+    return root
 
 
 logger = (
@@ -1,39 +1,50 @@
+from __future__ import annotations
+
 import os
 from collections.abc import Callable
+from typing import TYPE_CHECKING
 
-from google.genai import Client
-from google.genai.types import HttpOptions
 from httpx import AsyncClient, HTTPStatusError, Request, Response
 from pydantic.types import SecretStr
 from pydantic_ai.retries import AsyncTenacityTransport, RetryConfig, wait_retry_after
-from tenacity import retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 from dzai.logging_utils import logger
 
+if TYPE_CHECKING:
+    from google.genai import Client
+
+
+# 429: Rate limits.
+# 529: Server overloaded.
+_RETRY_STATUSES = frozenset({429, 529})
+
+
+def _should_retry_status(response: Response) -> None:
+    """Raise exceptions for retryable HTTP status codes."""
+    if response.status_code in _RETRY_STATUSES:
+        raise HTTPStatusError(
+            f"Retryable status {response.status_code} for url '{response.request.url}'",
+            request=response.request,
+            response=response,
+        )
+
+
+_RETRY_CONFIG = RetryConfig(
+    # Retry on HTTP errors and connection issues
+    retry=retry_if_exception_type((HTTPStatusError, ConnectionError)),
+    # Smart waiting: respects Retry-After headers, falls back to exponential backoff.
+    # The backoff is jittered so concurrent runs that hit a rate limit together don't retry in lockstep.
+    wait=wait_retry_after(fallback_strategy=wait_random_exponential(multiplier=1, max=60), max_wait=300),
+    # Stop after 5 attempts
+    stop=stop_after_attempt(5),
+    # Re-raise the last exception if all retries fail
+    reraise=True,
+)
+
 
 def _retrying_transport() -> AsyncTenacityTransport:
-    def should_retry_status(response: Response) -> None:
-        """Raise exceptions for retryable HTTP status codes."""
-        if response.status_code in (429, 529):
-            """
-            429: Rate limits.
-            529: Server overloaded.
-            """
-            response.raise_for_status()  # This will raise HTTPStatusError
-
-    return AsyncTenacityTransport(
-        config=RetryConfig(
-            # Retry on HTTP errors and connection issues
-            retry=retry_if_exception_type((HTTPStatusError, ConnectionError)),
-            # Smart waiting: respects Retry-After headers, falls back to exponential backoff
-            wait=wait_retry_after(fallback_strategy=wait_exponential(multiplier=1, max=60), max_wait=300),
-            # Stop after 5 attempts
-            stop=stop_after_attempt(5),
-            # Re-raise the last exception if all retries fail
-            reraise=True,
-        ),
-        validate_response=should_retry_status,
-    )
+    return AsyncTenacityTransport(config=_RETRY_CONFIG, validate_response=_should_retry_status)
 
 
 async def _log_request(request: Request) -> None:
@@ -55,6 +66,7 @@ async def _log_response(response: Response) -> None:
 def create_retrying_client(*, async_retrying_transport_callable: Callable = _retrying_transport) -> AsyncClient:
     """
     Create a client with smart retry handling for multiple error types.
+    The client owns a connection pool, so create it once and reuse it rather than creating one per request.
 
     Copied from here - https://ai.pydantic.dev/retries/#usage-example
     """
@@ -63,11 +75,37 @@ def create_retrying_client(*, async_retrying_transport_callable: Callable = _ret
     return AsyncClient(transport=transport)
 
 
+_SHARED_CLIENT: AsyncClient | None = None
+
+
+def get_shared_client() -> AsyncClient:
+    """
+    Process-wide retrying client, so every agent and sub-agent reuses one connection pool
+    instead of paying a new TCP + TLS handshake per client.
+    """
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        _SHARED_CLIENT = create_retrying_client()
+    return _SHARED_CLIENT
+
+
+async def aclose_shared_client() -> None:
+    """Close the shared client's connections. Call this before the event loop shuts down."""
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is not None:
+        await _SHARED_CLIENT.aclose()
+        _SHARED_CLIENT = None
+
+
 def google_retrying_client(*, api_key: SecretStr, async_retrying_transport: Callable = _retrying_transport) -> Client:
     """
     Configure Google Gen AI client with custom HttpOptions
     Note: The google-genai SDK supports passing custom client args
     """
+    # Imported here since the SDK is slow to import and only needed for Gemini models.
+    from google.genai import Client
+    from google.genai.types import HttpOptions
+
     transport = async_retrying_transport()
 
     async_client_args = {"transport": transport}
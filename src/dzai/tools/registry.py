@@ -1,7 +1,10 @@
 from pydantic_ai.toolsets.function import FunctionToolset
 
 from dzai.logging_utils import logger
-from dzai.tools.todo import ToDoItem, ToDoList
+from dzai.tools.todo import ToDoList
+
+# Indexed by `ToDoItem.completed`
+_STATUS_MARKS = ("○", "✓")
 
 
 def todo_toolset() -> FunctionToolset:
@@ -14,32 +17,32 @@ def todo_toolset() -> FunctionToolset:
     state = ToDoList()  # private per-toolset instance
 
     def add_todo(task: str) -> str:
-        state.todos.append(ToDoItem(task=task))
-        logger.info(f"Added task: {task}")
+        state.add(task)
+        logger.info("Added task: %s", task)
         return f"Added: {task}"
 
     def complete_todo(task: str) -> str:
-        for t in state.todos:
-            if t.task == task:
-                t.completed = True
-                logger.info(f"Completed task: {task}")
-                return f"Completed: {task}"
-        return f"Not found: {task}"
+        t = state.get(task)
+        if t is None:
+            return f"Not found: {task}"
+        t.completed = True
+        logger.info("Completed task: %s", task)
+        return f"Completed: {task}"
 
     def add_notes_to_todo(task: str, notes: str) -> str:
-        for t in state.todos:
-            if t.task == task:
-                t.notes = notes
-                return f"Noted: {task}"
-        return f"Not found: {task}"
+        t = state.get(task)
+        if t is None:
+            return f"Not found: {task}"
+        t.notes = notes
+        return f"Noted: {task}"
 
     def list_todos() -> str:
         if not state.todos:
             return "No todos."
         lines = ["Todos:"]
         for i, t in enumerate(state.todos, 1):
-            status = "✓" if t.completed else "○"
-            lines.append(f"{i}. {status} {t.task}" + (f" — {t.notes}" if t.notes else ""))
+            notes = f" — {t.notes}" if t.notes else ""
+            lines.append(f"{i}. {_STATUS_MARKS[t.completed]} {t.task}{notes}")
         return "\n".join(lines)
 
     # expose as tools (no globals; each call to make_todo_toolset gets fresh state)
@@ -1,15 +1,33 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from dataclasses import dataclass, field
 
 
-class ToDoItem(BaseModel):
+@dataclass(slots=True)
+class ToDoItem:
     task: str
     completed: bool = False
     notes: str = ""
 
 
-class ToDoList(BaseModel):
+@dataclass(slots=True)
+class ToDoList:
     """Data structure for managing research tasks"""
 
-    todos: list[ToDoItem] = []
+    todos: list[ToDoItem] = field(default_factory=list)
+
+    # Task -> position in `todos`, so lookups by task don't scan the list.
+    # The first item wins for duplicate tasks, same as a front-to-back scan.
+    _index: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        for position, item in enumerate(self.todos):
+            self._index.setdefault(item.task, position)
+
+    def add(self, task: str) -> None:
+        self._index.setdefault(task, len(self.todos))
+        self.todos.append(ToDoItem(task=task))
+
+    def get(self, task: str) -> ToDoItem | None:
+        position = self._index.get(task)
+        return None if position is None else self.todos[position]